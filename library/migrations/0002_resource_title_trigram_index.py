@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+# Django renders ``title__icontains`` as ``UPPER("title"::text) LIKE UPPER(...)``
+# on PostgreSQL, so the trigram index is built on that same expression.
+CREATE_TRIGRAM_INDEX = (
+    "CREATE INDEX IF NOT EXISTS library_resource_title_trgm "
+    "ON library_resource USING GIN ((UPPER(title::text)) gin_trgm_ops);"
+)
+DROP_TRIGRAM_INDEX = "DROP INDEX IF EXISTS library_resource_title_trgm;"
+
+
+def create_title_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    schema_editor.execute(CREATE_TRIGRAM_INDEX)
+
+
+def drop_title_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(DROP_TRIGRAM_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_title_trigram_index, drop_title_trigram_index),
+    ]
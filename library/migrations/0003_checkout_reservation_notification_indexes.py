@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0002_resource_title_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='checkout',
+            index=models.Index(fields=['patron', 'status'], name='checkout_patron_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checkout',
+            index=models.Index(fields=['status', 'due_date'], name='checkout_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checkout',
+            index=models.Index(fields=['resource', 'status'], name='checkout_resource_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['patron', 'status'], name='reservation_patron_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at'], name='notification_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations, models
+
+
+ROLE_CODES = {"PATRON": 1, "STAFF": 2, "ADMIN": 3}
+
+
+def role_names_to_codes(apps, schema_editor):
+    User = apps.get_model('library', 'User')
+    for name, code in ROLE_CODES.items():
+        User.objects.filter(role=name).update(role_code=code)
+
+
+def role_codes_to_names(apps, schema_editor):
+    User = apps.get_model('library', 'User')
+    for name, code in ROLE_CODES.items():
+        User.objects.filter(role_code=code).update(role=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0004_user_role_active_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_role_active_idx',
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='role_code',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.RunPython(role_names_to_codes, role_codes_to_names),
+        migrations.RemoveField(
+            model_name='user',
+            name='role',
+        ),
+        migrations.RenameField(
+            model_name='user',
+            old_name='role_code',
+            new_name='role',
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='role',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Patron'), (2, 'Staff'), (3, 'Admin')], default=1),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'is_active'], name='user_role_active_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_active_checkouts(apps, schema_editor):
+    # Before this constraint, a race could leave two ACTIVE checkouts on one
+    # resource. Fail with the offending ids instead of a bare IntegrityError.
+    Checkout = apps.get_model('library', 'Checkout')
+    duplicates = list(
+        Checkout.objects.filter(status='ACTIVE')
+        .values('resource')
+        .annotate(active=Count('id'))
+        .filter(active__gt=1)
+        .values_list('resource', flat=True)
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Resources with more than one ACTIVE checkout: %s. Mark the extra "
+            "checkouts RETURNED or LOST before applying this migration."
+            % ", ".join(str(pk) for pk in duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0005_user_role_smallint'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_active_checkouts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='checkout',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'ACTIVE')), fields=('resource',), name='unique_active_checkout'),
+        ),
+    ]
@@ -1,13 +1,15 @@
 from django.db import models
+from django.db.models import Count, DurationField, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Now
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 from django.core.validators import MinValueValidator
 
 
 class User(AbstractUser):
-    ROLE_PATRON = "PATRON"
-    ROLE_STAFF = "STAFF"
-    ROLE_ADMIN = "ADMIN"
+    ROLE_PATRON = 1
+    ROLE_STAFF = 2
+    ROLE_ADMIN = 3
 
     ROLE_CHOICES = [
         (ROLE_PATRON, "Patron"),
@@ -15,7 +17,13 @@ class User(AbstractUser):
         (ROLE_ADMIN, "Admin"),
     ]
 
-    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default=ROLE_PATRON)
+    # Small integer codes keep the column and the (role, is_active) index narrow.
+    role = models.PositiveSmallIntegerField(choices=ROLE_CHOICES, default=ROLE_PATRON)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=["role", "is_active"], name="user_role_active_idx"),
+        ]
 
     def is_patron(self):
         return self.role == self.ROLE_PATRON
@@ -27,6 +35,24 @@ class User(AbstractUser):
         return self.role == self.ROLE_ADMIN
 
 
+class ResourceQuerySet(models.QuerySet):
+    def with_counts(self):
+        """
+        Annotates each resource with ``checkout_count`` using a correlated
+        subquery, so counts never need a per-row COUNT from Python.
+        """
+        checkout_counts = (
+            Checkout.objects.filter(resource=OuterRef("pk"))
+            .order_by()
+            .values("resource")
+            .annotate(c=Count("*"))
+            .values("c")
+        )
+        return self.annotate(
+            checkout_count=Coalesce(Subquery(checkout_counts, output_field=IntegerField()), 0)
+        )
+
+
 class Resource(models.Model):
     TYPE_BOOK = "BOOK"
     TYPE_MEDIA = "MEDIA"
@@ -58,10 +84,23 @@ class Resource(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_AVAILABLE)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ResourceQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.title} ({self.get_resource_type_display()})"
 
 
+class CheckoutQuerySet(models.QuerySet):
+    def with_overdue(self):
+        """
+        Annotates each checkout with ``overdue_by`` (now - due_date),
+        computed by the database in the same query.
+        """
+        return self.annotate(
+            overdue_by=ExpressionWrapper(Now() - F("due_date"), output_field=DurationField())
+        )
+
+
 class Checkout(models.Model):
     STATUS_ACTIVE = "ACTIVE"
     STATUS_RETURNED = "RETURNED"
@@ -79,8 +118,25 @@ class Checkout(models.Model):
     due_date = models.DateTimeField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_ACTIVE)
 
-    def is_overdue(self):
-        return self.status == self.STATUS_ACTIVE and timezone.now() > self.due_date
+    objects = CheckoutQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["patron", "status"], name="checkout_patron_status_idx"),
+            models.Index(fields=["status", "due_date"], name="checkout_status_due_idx"),
+            models.Index(fields=["resource", "status"], name="checkout_resource_status_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["resource"],
+                condition=Q(status="ACTIVE"),
+                name="unique_active_checkout",
+            ),
+        ]
+
+    def is_overdue(self, now=None):
+        now = now or timezone.now()
+        return self.status == self.STATUS_ACTIVE and now > self.due_date
 
     def __str__(self):
         return f"Checkout #{self.id} - {self.resource} to {self.patron}"
@@ -115,6 +171,11 @@ class Reservation(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
     hold_until = models.DateTimeField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["patron", "status"], name="reservation_patron_status_idx"),
+        ]
+
     def __str__(self):
         return f"Reservation #{self.id} - {self.resource} for {self.patron}"
 
@@ -138,6 +199,11 @@ class Notification(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     is_read = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="notification_user_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.get_notification_type_display()} for {self.user}"
 
@@ -0,0 +1,50 @@
+from django.core.paginator import Page, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for unfiltered full-table listings.
+
+    On PostgreSQL the total is read from the planner statistics
+    (pg_class.reltuples) instead of running SELECT COUNT(*) over the whole
+    table. The estimate can drift slightly between ANALYZE runs, which is
+    acceptable for browsing. Other backends fall back to an exact count.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE relname = %s",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            # reltuples is -1 (or 0) until the table has been analyzed.
+            if row and row[0] > 0:
+                return int(row[0])
+        return super().count
+
+
+class FrozenPaginator(Paginator):
+    """
+    Paginator with a fixed count and no backing queryset, used by
+    freeze_page() so a rendered page can be stored in the cache.
+    """
+
+    def __init__(self, count, per_page):
+        super().__init__([], per_page)
+        self.count = count
+
+
+def freeze_page(page):
+    """
+    Returns a picklable copy of a Page with its rows evaluated and no
+    reference to the original queryset.
+    """
+    paginator = FrozenPaginator(page.paginator.count, page.paginator.per_page)
+    return Page(list(page.object_list), page.number, paginator)
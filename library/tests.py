@@ -1,3 +1,330 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Checkout, Notification, Reservation, Resource, User
+from .pagination import EstimatedCountPaginator, freeze_page
+from .views import POPULAR_RESOURCES_CACHE_KEY, admin_required, get_popular_resources, staff_required
+
+
+class PatronDashboardQueryTests(TestCase):
+    def setUp(self):
+        self.patron = User.objects.create_user(username="patron", password="pw")
+        self.client.force_login(self.patron)
+
+    def add_rows(self, count):
+        due_date = timezone.now() + timedelta(days=14)
+        for _ in range(count):
+            Checkout.objects.create(
+                patron=self.patron,
+                resource=Resource.objects.create(title="Checked out", status=Resource.STATUS_CHECKED_OUT),
+                due_date=due_date,
+            )
+            Reservation.objects.create(
+                patron=self.patron,
+                resource=Resource.objects.create(title="Reserved", status=Resource.STATUS_RESERVED),
+            )
+            Notification.objects.create(
+                user=self.patron, notification_type=Notification.TYPE_EVENT, message="Hello"
+            )
+
+    def test_query_count_does_not_grow_with_rows(self):
+        # Session, user, then one query each for checkouts, reservations and notifications.
+        self.add_rows(2)
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("patron_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["active_checkouts"]), 2)
+
+        self.add_rows(5)
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("patron_dashboard"))
+        self.assertEqual(len(response.context["active_checkouts"]), 7)
+        self.assertEqual(len(response.context["reservations"]), 7)
+
+
+class ResourceCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.patron = User.objects.create_user(username="patron", password="pw")
+        self.client.force_login(self.patron)
+        self.resource = Resource.objects.create(title="Dune")
+
+    def test_detail_reflects_checkout_after_commit(self):
+        detail_url = reverse("resource_detail", args=[self.resource.pk])
+        response = self.client.get(detail_url)
+        self.assertIsNone(response.context["current_checkout"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse("checkout_resource", args=[self.resource.pk]))
+
+        response = self.client.get(detail_url)
+        self.assertEqual(response.context["resource"].status, Resource.STATUS_CHECKED_OUT)
+        self.assertEqual(response.context["current_checkout"].patron.username, "patron")
+
+
+class ReturnNotifiesReservationsTests(TestCase):
+    def setUp(self):
+        self.patron = User.objects.create_user(username="patron", password="pw")
+        self.resource = Resource.objects.create(title="Dune", status=Resource.STATUS_RESERVED)
+        self.checkout = Checkout.objects.create(
+            patron=self.patron, resource=self.resource, due_date=timezone.now() + timedelta(days=14)
+        )
+        now = timezone.now()
+        # The cancelled reservation is the oldest and must be skipped.
+        self.cancelled = Reservation.objects.create(
+            patron=User.objects.create_user(username="cancelled", password="pw"),
+            resource=self.resource,
+            status=Reservation.STATUS_CANCELLED,
+            created_at=now - timedelta(days=3),
+        )
+        self.first = Reservation.objects.create(
+            patron=User.objects.create_user(username="first", password="pw"),
+            resource=self.resource,
+            created_at=now - timedelta(days=2),
+        )
+        self.second = Reservation.objects.create(
+            patron=User.objects.create_user(username="second", password="pw"),
+            resource=self.resource,
+            created_at=now - timedelta(days=1),
+        )
+        self.client.force_login(self.patron)
+
+    def test_return_notifies_oldest_pending_reservation_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse("return_resource", args=[self.checkout.pk]))
+
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.status, Reservation.STATUS_NOTIFIED)
+        self.assertTrue(
+            Notification.objects.filter(
+                user=self.first.patron, notification_type=Notification.TYPE_RESERVATION_AVAILABLE
+            ).exists()
+        )
+
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.status, Reservation.STATUS_PENDING)
+        self.assertFalse(Notification.objects.filter(user=self.second.patron).exists())
+
+        self.cancelled.refresh_from_db()
+        self.assertEqual(self.cancelled.status, Reservation.STATUS_CANCELLED)
+        self.assertFalse(Notification.objects.filter(user=self.cancelled.patron).exists())
+        self.assertEqual(Notification.objects.filter(user=self.patron).count(), 1)
+
+
+class NotificationFailureTests(TestCase):
+    def test_failed_notification_does_not_fail_checkout(self):
+        patron = User.objects.create_user(username="patron", password="pw")
+        resource = Resource.objects.create(title="Dune")
+        self.client.force_login(patron)
+
+        with mock.patch.object(Notification.objects, "create", side_effect=DatabaseError):
+            with self.assertLogs(level="ERROR"):
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.get(reverse("checkout_resource", args=[resource.pk]))
+
+        self.assertRedirects(response, reverse("patron_dashboard"))
+        self.assertTrue(Checkout.objects.filter(resource=resource, status=Checkout.STATUS_ACTIVE).exists())
+
+
+class CheckoutConstraintTests(TestCase):
+    def test_duplicate_active_checkout_rolls_back_status(self):
+        patron = User.objects.create_user(username="patron", password="pw")
+        other = User.objects.create_user(username="other", password="pw")
+        # Inconsistent state: marked available but already on loan.
+        resource = Resource.objects.create(title="Dune")
+        Checkout.objects.create(
+            patron=other, resource=resource, due_date=timezone.now() + timedelta(days=14)
+        )
+        self.client.force_login(patron)
+
+        response = self.client.get(reverse("checkout_resource", args=[resource.pk]))
+
+        self.assertRedirects(response, reverse("resource_detail", args=[resource.pk]))
+        resource.refresh_from_db()
+        self.assertEqual(resource.status, Resource.STATUS_AVAILABLE)
+        self.assertEqual(Checkout.objects.filter(resource=resource).count(), 1)
+
+
+class RoleDecoratorTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.staff_view = staff_required(lambda request: "ok")
+        self.admin_view = admin_required(lambda request: "ok")
+
+    def call(self, view, user):
+        request = self.factory.get("/")
+        request.user = user
+        return view(request)
+
+    def test_roles_are_integer_codes(self):
+        user = User.objects.create_user(username="patron", password="pw")
+        self.assertEqual(user.role, 1)
+        user.role = User.ROLE_STAFF
+        user.save()
+        user.refresh_from_db()
+        self.assertEqual(user.role, 2)
+        self.assertTrue(user.is_staff_user())
+
+    def test_staff_required(self):
+        staff = User(username="staff", role=User.ROLE_STAFF)
+        self.assertEqual(self.call(self.staff_view, staff), "ok")
+        for user in (User(username="admin", role=User.ROLE_ADMIN), User(username="patron"), AnonymousUser()):
+            self.assertEqual(self.call(self.staff_view, user).status_code, 302)
+
+    def test_admin_required(self):
+        admin = User(username="admin", role=User.ROLE_ADMIN)
+        self.assertEqual(self.call(self.admin_view, admin), "ok")
+        for user in (User(username="staff", role=User.ROLE_STAFF), User(username="patron"), AnonymousUser()):
+            self.assertEqual(self.call(self.admin_view, user).status_code, 302)
+
+
+class RoleMigrationTests(TransactionTestCase):
+    before = [("library", "0004_user_role_active_idx")]
+    after = [("library", "0005_user_role_smallint")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_role_names_round_trip_through_codes(self):
+        apps = self.migrate(self.before)
+        OldUser = apps.get_model("library", "User")
+        for name in ("PATRON", "STAFF", "ADMIN"):
+            OldUser.objects.create(username=name.lower(), role=name)
+
+        apps = self.migrate(self.after)
+        NewUser = apps.get_model("library", "User")
+        self.assertEqual(
+            dict(NewUser.objects.values_list("username", "role")),
+            {"patron": User.ROLE_PATRON, "staff": User.ROLE_STAFF, "admin": User.ROLE_ADMIN},
+        )
+
+        apps = self.migrate(self.before)
+        OldUser = apps.get_model("library", "User")
+        self.assertEqual(
+            dict(OldUser.objects.values_list("username", "role")),
+            {"patron": "PATRON", "staff": "STAFF", "admin": "ADMIN"},
+        )
+
+
+class ResourceListCacheKeyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user(username="patron", password="pw"))
+        Resource.objects.create(title="Dune")
+
+    def test_invalid_page_numbers_share_the_resolved_page_entry(self):
+        url = reverse("resource_list")
+        self.client.get(url)
+        for page in ("1", "abc", "999"):
+            # Session and user only: count and page both come from the cache.
+            with self.assertNumQueries(2):
+                response = self.client.get(url, {"page": page})
+            self.assertEqual(response.context["page_obj"].number, 1)
+
+
+class PopularResourcesCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user(username="patron", password="pw"))
+        self.resource = Resource.objects.create(title="Dune")
+
+    def test_checkout_drops_cached_top10_only_after_commit(self):
+        get_popular_resources()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.get(reverse("checkout_resource", args=[self.resource.pk]))
+            self.assertIsNotNone(cache.get(POPULAR_RESOURCES_CACHE_KEY))
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(POPULAR_RESOURCES_CACHE_KEY))
+        self.assertEqual(get_popular_resources()[0].checkout_count, 1)
+
+
+class PaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Resource.objects.bulk_create(Resource(title=f"Title {i:03d}") for i in range(120))
+        self.resources = Resource.objects.order_by("title")
+
+    def test_estimated_count_falls_back_to_exact_count_on_sqlite(self):
+        paginator = EstimatedCountPaginator(self.resources, 50)
+        self.assertEqual(paginator.count, 120)
+        self.assertEqual(paginator.num_pages, 3)
+
+    def test_frozen_page_survives_cache_round_trip(self):
+        page = freeze_page(Paginator(self.resources, 50).get_page(2))
+        cache.set("frozen_page", page)
+        cached = cache.get("frozen_page")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(cached.number, 2)
+            self.assertEqual(cached.paginator.num_pages, 3)
+            self.assertTrue(cached.has_next())
+            self.assertEqual(
+                [r.title for r in cached.object_list],
+                [f"Title {i:03d}" for i in range(50, 100)],
+            )
+
+    def test_staff_dashboard_paginates_resources(self):
+        self.client.force_login(
+            User.objects.create_user(username="staff", password="pw", role=User.ROLE_STAFF)
+        )
+        response = self.client.get(reverse("staff_dashboard"), {"page": 3})
+        page_obj = response.context["page_obj"]
+        self.assertEqual(page_obj.number, 3)
+        self.assertEqual(
+            [r.title for r in page_obj.object_list],
+            [f"Title {i:03d}" for i in range(100, 120)],
+        )
+
+
+class StaffDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(
+            User.objects.create_user(username="staff", password="pw", role=User.ROLE_STAFF)
+        )
+        self.patron = User.objects.create_user(username="patron", password="pw")
+
+    def add_overdue(self, count, days=3):
+        for _ in range(count):
+            Checkout.objects.create(
+                patron=self.patron,
+                resource=Resource.objects.create(title="Overdue", status=Resource.STATUS_CHECKED_OUT),
+                due_date=timezone.now() - timedelta(days=days, hours=1),
+            )
+
+    def test_overdue_checkouts_show_days_overdue(self):
+        self.add_overdue(1)
+        response = self.client.get(reverse("staff_dashboard"))
+        (checkout,) = response.context["overdue_checkouts"]
+        self.assertEqual(checkout.overdue_by.days, 3)
+        self.assertContains(response, "<th>Days Overdue</th>", html=True)
+        self.assertContains(response, "<td>3</td>", html=True)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        # Session, user, resource count, resource page, overdue list, popular top 10.
+        self.add_overdue(2)
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse("staff_dashboard"))
+        self.assertEqual(len(response.context["overdue_checkouts"]), 2)
+
+        cache.clear()
+        self.add_overdue(5)
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse("staff_dashboard"))
+        self.assertEqual(len(response.context["overdue_checkouts"]), 7)
@@ -1,22 +1,35 @@
+import hashlib
+from datetime import timedelta
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.shortcuts import render, get_object_or_404, redirect
 from django.utils import timezone
-from django.db.models import Count
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
 
 from .models import Resource, Checkout, Return, Reservation, Notification, User, Report
+from .pagination import EstimatedCountPaginator, freeze_page
 
 
 # ---------- Helpers for role checks ----------
 
+def _is_staff(user) -> bool:
+    # is_authenticated first: AnonymousUser has no role.
+    return user.is_authenticated and user.is_staff_user()
+
+
+def _is_admin(user) -> bool:
+    return user.is_authenticated and user.is_admin_user()
+
+
 def staff_required(view_func):
     """
     Wraps a view so that only authenticated users with role STAFF can access.
     """
     # First apply user_passes_test to the view, then wrap that with login_required.
-    decorated_view = login_required(
-        user_passes_test(lambda u: u.is_authenticated and u.is_staff_user())(view_func)
-    )
+    decorated_view = login_required(user_passes_test(_is_staff)(view_func))
     return decorated_view
 
 
@@ -24,9 +37,7 @@ def admin_required(view_func):
     """
     Wraps a view so that only authenticated users with role ADMIN can access.
     """
-    decorated_view = login_required(
-        user_passes_test(lambda u: u.is_authenticated and u.is_admin_user())(view_func)
-    )
+    decorated_view = login_required(user_passes_test(_is_admin)(view_func))
     return decorated_view
 
 
@@ -34,6 +45,17 @@ def admin_required(view_func):
 
 MAX_ACTIVE_RESERVATIONS_PER_PATRON = 10  # NF requirement
 
+POPULAR_RESOURCES_CACHE_KEY = "popular_resources_top10"
+POPULAR_RESOURCES_CACHE_TIMEOUT = 300  # seconds
+
+NOTIFICATION_BATCH_SIZE = 100
+
+RESOURCES_PER_PAGE = 50
+
+# Cached resource pages are keyed on this version; bumping it invalidates them all.
+RESOURCE_CACHE_VERSION_KEY = "resource_cache_version"
+RESOURCE_CACHE_TIMEOUT = 60  # seconds
+
 
 def calculate_due_date():
 
@@ -44,14 +66,101 @@ def calculate_overdue_fine(checkout: Checkout) -> float:
     """
     Simple fine rule: $1 per day overdue.
     """
-    if not checkout.is_overdue():
+    now = timezone.now()
+    if not checkout.is_overdue(now):
         return 0.0
-    days_overdue = (timezone.now() - checkout.due_date).days
+    days_overdue = (now - checkout.due_date).days
     return max(0, days_overdue) * 1.0
 
 
 def create_notification(user: User, ntype: str, message: str):
-    Notification.objects.create(user=user, notification_type=ntype, message=message)
+    """
+    Notifications are written after the surrounding transaction commits,
+    keeping the INSERT out of the transaction and skipping it on rollback.
+    A failed INSERT is logged rather than turning the committed action into a 500.
+    """
+    transaction.on_commit(
+        lambda: Notification.objects.create(user=user, notification_type=ntype, message=message),
+        robust=True,
+    )
+
+
+def create_notifications(notifications: list):
+    """
+    Bulk variant of create_notification() for unsaved Notification instances.
+    """
+    transaction.on_commit(
+        lambda: Notification.objects.bulk_create(notifications, batch_size=NOTIFICATION_BATCH_SIZE),
+        robust=True,
+    )
+
+
+def reservation_available_notifications(resource: Resource) -> list:
+    """
+    Builds the (unsaved) notification for the oldest pending reservation on
+    the resource and marks that reservation as notified. Later reservations
+    stay pending so they keep their place in the queue.
+    """
+    # Lock the row and update exactly that id, so the reservation marked
+    # notified is always the one that gets the message.
+    pending = list(
+        Reservation.objects.select_for_update()
+        .filter(resource=resource, status=Reservation.STATUS_PENDING)
+        .order_by("created_at", "id")
+        .values_list("id", "patron_id")[:1]
+    )
+    if pending:
+        Reservation.objects.filter(
+            pk__in=[reservation_id for reservation_id, _ in pending]
+        ).update(status=Reservation.STATUS_NOTIFIED)
+    return [
+        Notification(
+            user_id=patron_id,
+            notification_type=Notification.TYPE_RESERVATION_AVAILABLE,
+            message=f"'{resource.title}' has been returned and is now available.",
+        )
+        for _, patron_id in pending
+    ]
+
+
+def get_popular_resources():
+    """
+    Top 10 resources by checkout count, cached for a few minutes
+    since the aggregation scans every checkout.
+    """
+    popular_resources = cache.get(POPULAR_RESOURCES_CACHE_KEY)
+    if popular_resources is None:
+        popular_resources = list(
+            Resource.objects.only("id", "title").with_counts().order_by("-checkout_count")[:10]
+        )
+        cache.set(POPULAR_RESOURCES_CACHE_KEY, popular_resources, POPULAR_RESOURCES_CACHE_TIMEOUT)
+    return popular_resources
+
+
+def invalidate_popular_resources():
+    """
+    Drops the cached top 10 once the current transaction commits, like
+    invalidate_resource_cache().
+    """
+    transaction.on_commit(lambda: cache.delete(POPULAR_RESOURCES_CACHE_KEY))
+
+
+def get_resource_cache_version() -> int:
+    return cache.get_or_set(RESOURCE_CACHE_VERSION_KEY, 1, None)
+
+
+def invalidate_resource_cache():
+    """
+    Drops cached resource list/detail pages once the current transaction
+    commits, so readers never re-cache the pre-commit state.
+    """
+    def bump():
+        try:
+            cache.incr(RESOURCE_CACHE_VERSION_KEY)
+        except ValueError:
+            cache.set(RESOURCE_CACHE_VERSION_KEY, 1, None)
+
+    transaction.on_commit(bump)
 
 
 # ---------- Patron views ----------
@@ -65,11 +174,16 @@ def patron_dashboard(request):
     if not patron.is_patron():
         return redirect("staff_dashboard")
 
-    active_checkouts = Checkout.objects.filter(patron=patron, status=Checkout.STATUS_ACTIVE)
+    # Each list loads only the columns dashboard.html renders.
+    active_checkouts = Checkout.objects.filter(
+        patron=patron, status=Checkout.STATUS_ACTIVE
+    ).select_related("resource").only("id", "due_date", "resource__title")
     reservations = Reservation.objects.filter(patron=patron).exclude(
         status=Reservation.STATUS_CANCELLED
-    )
-    notifications = Notification.objects.filter(user=patron).order_by("-created_at")[:10]
+    ).select_related("resource").only("id", "status", "resource__title")
+    notifications = Notification.objects.filter(user=patron).only(
+        "id", "created_at", "message"
+    ).order_by("-created_at")[:10]
 
     context = {
         "active_checkouts": active_checkouts,
@@ -86,22 +200,58 @@ def resource_list(request):
     Implements FR6–FR8.
     """
     query = request.GET.get("q", "")
-    resources = Resource.objects.all()
+    resources = Resource.objects.only("id", "title", "resource_type", "status").order_by("title")
     if query:
         resources = resources.filter(title__icontains=query)
-    context = {"resources": resources, "query": query}
+        paginator = Paginator(resources, RESOURCES_PER_PAGE)
+    else:
+        paginator = EstimatedCountPaginator(resources, RESOURCES_PER_PAGE)
+
+    version = get_resource_cache_version()
+    query_digest = hashlib.md5(query.encode()).hexdigest()
+    count_key = f"resource_list_count:{query_digest}"
+    count = cache.get(count_key, version=version)
+    if count is None:
+        count = paginator.count
+        cache.set(count_key, count, RESOURCE_CACHE_TIMEOUT, version=version)
+    else:
+        paginator.count = count
+
+    # Key on the resolved page number, so "?page=abc", "?page=999" or no
+    # parameter at all share the entry of the page they actually show.
+    page = paginator.get_page(request.GET.get("page"))
+    cache_key = f"resource_list:{query_digest}:{page.number}"
+    page_obj = cache.get(cache_key, version=version)
+    if page_obj is None:
+        page_obj = freeze_page(page)
+        cache.set(cache_key, page_obj, RESOURCE_CACHE_TIMEOUT, version=version)
+
+    context = {"page_obj": page_obj, "query": query}
     return render(request, "library/resource_list.html", context)
 
 
 @login_required
 def resource_detail(request, pk):
-    resource = get_object_or_404(Resource, pk=pk)
-    current_checkout = Checkout.objects.filter(resource=resource, status=Checkout.STATUS_ACTIVE).first()
+    version = get_resource_cache_version()
+    cache_key = f"resource_detail:{pk}"
+    cached = cache.get(cache_key, version=version)
+    if cached is None:
+        resource = get_object_or_404(Resource, pk=pk)
+        current_checkout = (
+            Checkout.objects.filter(resource=resource, status=Checkout.STATUS_ACTIVE)
+            .select_related("patron")
+            .only("id", "due_date", "patron__username")
+            .first()
+        )
+        cached = (resource, current_checkout)
+        cache.set(cache_key, cached, RESOURCE_CACHE_TIMEOUT, version=version)
+    resource, current_checkout = cached
     context = {"resource": resource, "current_checkout": current_checkout}
     return render(request, "library/resource_detail.html", context)
 
 
 @login_required
+@transaction.atomic
 def checkout_resource(request, pk):
     """
     Patron checks out a resource (FR9–FR12).
@@ -111,19 +261,32 @@ def checkout_resource(request, pk):
         messages.error(request, "Only patrons can checkout resources.")
         return redirect("resource_detail", pk=pk)
 
-    resource = get_object_or_404(Resource, pk=pk)
-    if resource.status != Resource.STATUS_AVAILABLE:
+    # Status is checked by the guarded UPDATE below, so only the title is needed here.
+    resource = get_object_or_404(Resource.objects.only("id", "title"), pk=pk)
+    # Flip the status only if it is still available, so two concurrent
+    # checkouts cannot both succeed.
+    claimed = Resource.objects.filter(
+        pk=resource.pk, status=Resource.STATUS_AVAILABLE
+    ).update(status=Resource.STATUS_CHECKED_OUT)
+    if not claimed:
         messages.error(request, "Resource is not available for checkout.")
         return redirect("resource_detail", pk=pk)
 
     due_date = calculate_due_date()
-    checkout = Checkout.objects.create(
-        patron=patron,
-        resource=resource,
-        due_date=due_date,
-    )
-    resource.status = Resource.STATUS_CHECKED_OUT
-    resource.save()
+    try:
+        with transaction.atomic():
+            Checkout.objects.create(
+                patron=patron,
+                resource=resource,
+                due_date=due_date,
+            )
+    except IntegrityError:
+        # The resource already has an active checkout (unique_active_checkout).
+        transaction.set_rollback(True)
+        messages.error(request, "Resource is not available for checkout.")
+        return redirect("resource_detail", pk=pk)
+    invalidate_popular_resources()
+    invalidate_resource_cache()
 
     create_notification(
         patron,
@@ -136,45 +299,47 @@ def checkout_resource(request, pk):
 
 
 @login_required
+@transaction.atomic
 def return_resource(request, checkout_id):
     """
     Patron returns a resource (FR21–FR22).
     Handles overdue and fine calculation.
     """
     patron = request.user
-    checkout = get_object_or_404(Checkout, id=checkout_id, patron=patron)
+    checkout = get_object_or_404(
+        Checkout.objects.select_related("resource"), id=checkout_id, patron=patron
+    )
 
-    if checkout.status != Checkout.STATUS_ACTIVE:
+    fine = calculate_overdue_fine(checkout)
+    closed = Checkout.objects.filter(
+        pk=checkout.pk, status=Checkout.STATUS_ACTIVE
+    ).update(status=Checkout.STATUS_RETURNED)
+    if not closed:
         messages.error(request, "Checkout is not active.")
         return redirect("patron_dashboard")
 
-    fine = calculate_overdue_fine(checkout)
     Return.objects.create(checkout=checkout, fine_amount=fine)
-    checkout.status = Checkout.STATUS_RETURNED
-    checkout.save()
-
+    Resource.objects.filter(pk=checkout.resource_id).update(status=Resource.STATUS_AVAILABLE)
+    invalidate_resource_cache()
     resource = checkout.resource
-    resource.status = Resource.STATUS_AVAILABLE
-    resource.save()
 
     if fine > 0:
-        create_notification(
-            patron,
-            Notification.TYPE_OVERDUE,
-            f"Returned '{resource.title}' with an overdue fine of ${fine:.2f}."
-        )
+        ntype = Notification.TYPE_OVERDUE
+        message = f"Returned '{resource.title}' with an overdue fine of ${fine:.2f}."
     else:
-        create_notification(
-            patron,
-            Notification.TYPE_EVENT,
-            f"Successfully returned '{resource.title}'."
-        )
+        ntype = Notification.TYPE_EVENT
+        message = f"Successfully returned '{resource.title}'."
+
+    notifications = [Notification(user=patron, notification_type=ntype, message=message)]
+    notifications.extend(reservation_available_notifications(resource))
+    create_notifications(notifications)
 
     messages.success(request, f"Returned '{resource.title}'. Fine: ${fine:.2f}.")
     return redirect("patron_dashboard")
 
 
 @login_required
+@transaction.atomic
 def reserve_resource(request, pk):
     """
     Patron reserves an unavailable resource (FR13–FR15).
@@ -183,21 +348,24 @@ def reserve_resource(request, pk):
     patron = request.user
     resource = get_object_or_404(Resource, pk=pk)
 
-    active_res_count = Reservation.objects.filter(
+    # Only fetch as many ids as the limit, so the database can stop early.
+    active_res_ids = Reservation.objects.filter(
         patron=patron,
         status=Reservation.STATUS_PENDING
-    ).count()
-    if active_res_count >= MAX_ACTIVE_RESERVATIONS_PER_PATRON:
+    ).values_list("id", flat=True)[:MAX_ACTIVE_RESERVATIONS_PER_PATRON]
+    if len(active_res_ids) >= MAX_ACTIVE_RESERVATIONS_PER_PATRON:
         messages.error(request, "Reservation limit reached (max 10).")
         return redirect("resource_detail", pk=pk)
 
-    if resource.status == Resource.STATUS_AVAILABLE:
+    reserved = Resource.objects.filter(pk=resource.pk).exclude(
+        status=Resource.STATUS_AVAILABLE
+    ).update(status=Resource.STATUS_RESERVED)
+    if not reserved:
         messages.info(request, "Resource is available. Consider checking it out instead.")
         return redirect("resource_detail", pk=pk)
 
     Reservation.objects.create(patron=patron, resource=resource)
-    resource.status = Resource.STATUS_RESERVED
-    resource.save()
+    invalidate_resource_cache()
 
     create_notification(
         patron,
@@ -216,18 +384,21 @@ def staff_dashboard(request):
     """
     Staff dashboard: real-time availability and overdue items (FR24–FR31).
     """
-    resources = Resource.objects.all()
-    overdue_checkouts = Checkout.objects.filter(
+    resources = Resource.objects.only("id", "title", "status").order_by("title")
+    page_obj = EstimatedCountPaginator(resources, RESOURCES_PER_PAGE).get_page(
+        request.GET.get("page")
+    )
+    overdue_checkouts = Checkout.objects.with_overdue().filter(
         status=Checkout.STATUS_ACTIVE,
         due_date__lt=timezone.now(),
+    ).select_related("patron", "resource").only(
+        "id", "due_date", "patron__username", "resource__title"
     )
 
-    popular_resources = Resource.objects.annotate(
-        checkout_count=Count("checkouts")
-    ).order_by("-checkout_count")[:10]
+    popular_resources = get_popular_resources()
 
     context = {
-        "resources": resources,
+        "page_obj": page_obj,
         "overdue_checkouts": overdue_checkouts,
         "popular_resources": popular_resources,
     }
@@ -235,29 +406,35 @@ def staff_dashboard(request):
 
 
 @staff_required
+@transaction.atomic
 def staff_process_return(request, checkout_id):
     """
     Staff processes return on behalf of patron (FR34).
     """
-    checkout = get_object_or_404(Checkout, id=checkout_id)
-    if checkout.status != Checkout.STATUS_ACTIVE:
+    checkout = get_object_or_404(Checkout.objects.select_related("resource"), id=checkout_id)
+
+    fine = calculate_overdue_fine(checkout)
+    closed = Checkout.objects.filter(
+        pk=checkout.pk, status=Checkout.STATUS_ACTIVE
+    ).update(status=Checkout.STATUS_RETURNED)
+    if not closed:
         messages.error(request, "Checkout is not active.")
         return redirect("staff_dashboard")
 
-    fine = calculate_overdue_fine(checkout)
     Return.objects.create(checkout=checkout, fine_amount=fine)
-    checkout.status = Checkout.STATUS_RETURNED
-    checkout.save()
-
+    Resource.objects.filter(pk=checkout.resource_id).update(status=Resource.STATUS_AVAILABLE)
+    invalidate_resource_cache()
     resource = checkout.resource
-    resource.status = Resource.STATUS_AVAILABLE
-    resource.save()
 
-    create_notification(
-        checkout.patron,
-        Notification.TYPE_OVERDUE if fine > 0 else Notification.TYPE_EVENT,
-        f"Return processed by staff for '{resource.title}'. Fine: ${fine:.2f}."
-    )
+    notifications = [
+        Notification(
+            user_id=checkout.patron_id,
+            notification_type=Notification.TYPE_OVERDUE if fine > 0 else Notification.TYPE_EVENT,
+            message=f"Return processed by staff for '{resource.title}'. Fine: ${fine:.2f}.",
+        )
+    ]
+    notifications.extend(reservation_available_notifications(resource))
+    create_notifications(notifications)
 
     messages.success(request, f"Return processed for '{resource.title}'. Fine: ${fine:.2f}.")
     return redirect("staff_dashboard")
@@ -270,7 +447,9 @@ def admin_staff_list(request):
     """
     Admin manages staff accounts (FR35–FR37).
     """
-    staff_members = User.objects.filter(role=User.ROLE_STAFF)
+    staff_members = User.objects.filter(role=User.ROLE_STAFF).only(
+        "id", "username", "is_active"
+    ).order_by("username")
     context = {"staff_members": staff_members}
     return render(request, "library/admin_staff_list.html", context)
 
@@ -306,14 +485,11 @@ def generate_popular_resources_report(request):
     """
     Generates a simple 'Popular Resources' report (FR28).
     """
-    popular_resources = Resource.objects.annotate(
-        checkout_count=Count("checkouts")
-    ).order_by("-checkout_count")[:20]
-
-    data = [
-        {"title": r.title, "checkout_count": r.checkout_count}
-        for r in popular_resources
-    ]
+    # Counting per resource before values() keeps two resources with the same
+    # title apart, while returning plain dicts ready for the JSON field.
+    data = list(
+        Resource.objects.with_counts().values("title", "checkout_count").order_by("-checkout_count")[:20]
+    )
 
     report = Report.objects.create(
         report_type=Report.TYPE_POPULAR_RESOURCES,